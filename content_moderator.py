@@ -5,42 +5,266 @@ Uses AI to automatically classify web content for spam, ads, and other issues.
 """
 
 import os
-import json
-import csv
-import pandas as pd
 import argparse
+import asyncio
+import hashlib
+import shelve
+import sys
 import time
-from typing import Dict, List, Any, Tuple
-from datetime import datetime
+from array import array
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Dict, List, Any, Tuple, Iterable, Iterator
 from dotenv import load_dotenv
-import requests
+import httpx
+import numpy as np
+import orjson
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pa_csv
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory file locks
+    fcntl = None
 
 # Load API key from environment
 load_dotenv()
 
+def _extract_json(text: str, opener: str = '{') -> Any:
+    """Decode the first complete JSON object (or array, with opener='[') embedded in model output.
+
+    Scans brackets left to right, ignoring any inside JSON strings, so prose or code fences
+    containing stray braces around the real answer don't break parsing. Arrays must hold
+    objects, so a prose reference like "[1]" ahead of a packed answer is skipped.
+    """
+    closer = '}' if opener == '{' else ']'
+    
+    def is_answer(value: Any) -> bool:
+        if opener == '{':
+            return isinstance(value, dict)
+        return isinstance(value, list) and bool(value) and all(isinstance(item, dict) for item in value)
+    
+    start = text.find(opener)
+    if start == -1:
+        raise ValueError("No JSON found in response")
+    
+    # Fast path: clean output (optionally fenced) is a single outermost span
+    try:
+        value = orjson.loads(text[start:text.rindex(closer) + 1])
+        if is_answer(value):
+            return value
+    except (ValueError, orjson.JSONDecodeError):
+        pass
+    
+    while start != -1:
+        depth = 0
+        in_string = False
+        escaped = False
+        for index in range(start, len(text)):
+            char = text[index]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == opener:
+                depth += 1
+            elif char == closer:
+                depth -= 1
+                if depth == 0:
+                    try:
+                        value = orjson.loads(text[start:index + 1])
+                    except orjson.JSONDecodeError:
+                        break  # Balanced but not JSON (e.g. "{ok}" in prose), try the next opener
+                    if is_answer(value):
+                        return value
+                    break  # Valid JSON of the wrong shape (e.g. "[1]"), try the next opener
+        start = text.find(opener, start + 1)
+    raise ValueError("No JSON found in response")
+
+# Flag values the model uses to mean YES (True hashes equal to 1)
+_TRUE_SET = frozenset({1, '1', 'yes', 'Yes', 'YES', 'true', 'True'})
+
+def _to01(value: Any) -> int:
+    """Coerce a flag returned by the model (bool, int or string) to 0/1"""
+    try:
+        return 1 if value in _TRUE_SET else 0
+    except TypeError:
+        # Unhashable values (lists, objects) are never a YES
+        return 0
+
+class SemanticCache:
+    """Embedding index that reuses labels for near-duplicate content across runs"""
+
+    # Labels are stored as one fixed-width uint8 row per cached entry
+    LABEL_COLUMNS = ('labels_spam', 'keyword_spam', 'malicious_links', 'ads',
+                     'wrong_language', 'unreadable', 'confidence_score')
+
+    def __init__(self, cache_dir: str = 'cache', threshold: float = 0.95, name: str = 'semantic'):
+        """Load the embedding model and memory-map any index persisted by a previous run"""
+        try:
+            import faiss
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ValueError("Semantic cache requires faiss-cpu and sentence-transformers: "
+                             "pip install faiss-cpu sentence-transformers")
+        
+        self._faiss = faiss
+        self.threshold = threshold
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, f'{name}.faiss')
+        self.labels_path = os.path.join(cache_dir, f'{name}_labels.npy')
+        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        
+        # Both files are memory-mapped, so start-up cost doesn't grow with the cache size
+        self.index = None
+        self.labels = np.zeros((0, len(self.LABEL_COLUMNS)), dtype=np.uint8)
+        if os.path.exists(self.index_path) and os.path.exists(self.labels_path):
+            self.index = faiss.read_index(self.index_path, faiss.IO_FLAG_MMAP)
+            self.labels = np.load(self.labels_path, mmap_mode='r')
+        self.new_labels = []  # Rows added during this run
+        
+        # Start fresh if nothing was persisted or the index and labels disagree
+        if self.index is None or self.index.ntotal != len(self.labels):
+            self.index = faiss.IndexFlatIP(self.model.get_sentence_embedding_dimension())
+            self.labels = np.zeros((0, len(self.LABEL_COLUMNS)), dtype=np.uint8)
+        
+        print(f"🧠 Semantic cache ready with {len(self.labels)} entries")
+
+    def encode(self, content: str):
+        """Embed content as a normalized (1, dim) float32 matrix"""
+        return self.model.encode([content[:2000]], normalize_embeddings=True)
+
+    def lookup(self, embedding) -> Dict[str, Any]:
+        """Return cached labels for the nearest neighbour if it is similar enough"""
+        if self.index.ntotal == 0:
+            return None
+        
+        scores, ids = self.index.search(embedding, 1)
+        if scores[0, 0] <= self.threshold:
+            return None
+        
+        position = int(ids[0, 0])
+        if position < len(self.labels):
+            row = self.labels[position]
+        else:
+            row = self.new_labels[position - len(self.labels)]
+        
+        values = dict(zip(self.LABEL_COLUMNS, (int(v) for v in row)))
+        labels = {key: values[key] for key in ('keyword_spam', 'malicious_links', 'ads')}
+        for key in ('wrong_language', 'unreadable'):
+            if values[key]:
+                labels[key] = 1
+        return {
+            'labels_spam': values['labels_spam'],
+            'labels_spam_vector': labels,
+            'confidence_score': values['confidence_score']
+        }
+
+    def add(self, embedding, result: Dict[str, Any]):
+        """Remember the labels produced for an embedding"""
+        self.index.add(embedding)
+        labels = result['labels_spam_vector']
+        self.new_labels.append([
+            result['labels_spam'], labels.get('keyword_spam', 0), labels.get('malicious_links', 0),
+            labels.get('ads', 0), labels.get('wrong_language', 0), labels.get('unreadable', 0),
+            result.get('confidence_score', 1)
+        ])
+
+    def save(self):
+        """Persist the index and its labels for the next run"""
+        if not self.new_labels:
+            return
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.labels = np.concatenate([self.labels, np.array(self.new_labels, dtype=np.uint8)])
+        self.new_labels = []
+        
+        # Write to temporary files and swap them in, as the old files may still be mapped
+        self._faiss.write_index(self.index, self.index_path + '.tmp')
+        with open(self.labels_path + '.tmp', 'wb') as file:
+            np.save(file, self.labels)
+        os.replace(self.index_path + '.tmp', self.index_path)
+        os.replace(self.labels_path + '.tmp', self.labels_path)
+
+@dataclass
+class ResultScan:
+    """Schema issues plus columnar label flags and confidence scores, gathered in one pass over results"""
+
+    # Column order of labels; matches the categories used by validate_results
+    LABEL_COLUMNS = ('keyword_spam', 'malicious_links', 'ads', 'wrong_language', 'unreadable', 'labels_spam')
+
+    schema_issues: List[Dict[str, Any]] = field(default_factory=list)
+    labels: np.ndarray = None  # N x len(LABEL_COLUMNS) int8, 1 where the result has that label
+    confidence: np.ndarray = None  # N int8 confidence scores (0 where the score is invalid)
+
+    @property
+    def total(self) -> int:
+        return len(self.confidence)
+
+    def label_counts(self) -> Dict[str, int]:
+        """Number of results flagged for each label column"""
+        return dict(zip(self.LABEL_COLUMNS, self.labels.sum(axis=0).tolist()))
+
+    def confidence_counts(self) -> np.ndarray:
+        """Number of results at each confidence score, indexed by score (index 0 counts invalid scores)"""
+        return np.bincount(self.confidence, minlength=6)
+
 class ContentModerator:
-    def __init__(self):
+    def __init__(self, semantic_cache: bool = False, exact_cache: bool = True, save_content: bool = True,
+                 items_per_request: int = 1, max_concurrent: int = 10):
         """Set up the AI model for content analysis"""
         self.api_key = os.getenv('GROQ_API_KEY')
         if not self.api_key:
             raise ValueError("Please set GROQ_API_KEY in your .env file")
         
         # Groq API configuration
-        self.api_url = "https://api.groq.com/openai/v1/chat/completions"
+        self.api_base = "https://api.groq.com/openai/v1"
+        self.api_url = f"{self.api_base}/chat/completions"
         self.model_name = "llama-3.1-8b-instant"  # Fast model available in free tier
         self.headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
+            "Authorization": f"Bearer {self.api_key}"
         }
         
         # Rate limiting configuration for Groq free tier
-        self.rate_limit_delay = 1.0  # 1 second between requests (conservative for free tier)
         self.max_requests_per_minute = 30  # Conservative limit for free tier
-        self.request_times = []  # Track request times for rate limiting
+        self.max_concurrent = max_concurrent  # Maximum in-flight requests at any time
+        
+        # Longer content is sent as head + tail only; classification rarely needs more
+        self.max_content_chars = 4000
+        
+        # Items packed into one request so the rubric prefix is paid once per pack (1 = off)
+        self.items_per_request = items_per_request
+        self.max_pack_chars = 12000  # Content budget per packed request (~3k tokens)
         
-        # Master prompt for content analysis
+        # Token bucket: bursts up to the per-minute cap, then refills at a steady rate
+        self._tokens = float(self.max_requests_per_minute)
+        self._last_refill = time.monotonic()
+        
+        # Output records carry the full content, or only its SHA-256 when this is off
+        self.save_content = save_content
+        
+        # All output files (results, validation reports) go here; created once up front
+        self.results_dir = 'results'
+        os.makedirs(self.results_dir, exist_ok=True)
+        
+        # Packed answers can label differently from single-item ones, so each pack size
+        # gets its own cache files rather than sharing them with unpacked runs
+        cache_suffix = f"_packed{items_per_request}" if items_per_request > 1 else ""
+        
+        # Optional cache that skips the API for near-duplicate content
+        self.semantic_cache = SemanticCache(name=f'semantic{cache_suffix}') if semantic_cache else None
+        
+        # Master prompt for content analysis, sent once per request as the system message.
+        # It never changes between requests, so the provider can reuse it as a cached prefix;
+        # only the content itself goes in the user message.
         self.master_prompt = """You are an expert content moderator for Argos SmartSuite.
-Analyze the following content and answer these 5 questions with YES or NO:
+Analyze the content provided by the user and answer these 5 questions with YES or NO:
 
 1. Keyword Spam: Reading the entire content, is there any Keyword Spam in the text? 
 Keyword spam involves the intentional placement of certain words on a web page to influence search engines or other websites that index the page. These terms will have little to no connection to the content of a page, these terms are used simply to attract more traffic to the website. These keywords may appear many times one after another, or appear in a list or group. You can identify this keyword spam by looking for repeated terms that appear out of context; unrelated to the text content on the page. If you see certain terms repeated many times in this manner, please select this category in your annotation.
@@ -96,81 +320,143 @@ IMPORTANT RULES:
 - If Unreadable = YES, then all other answers = NO
 - labels_spam = 1 if ANY of the first 3 questions = YES
 
-Content: {content}
-
 Return ONLY a JSON object in this exact format:
-{{
+{
   "labels_spam": 0,
-  "labels_spam_vector": {{
+  "labels_spam_vector": {
     "keyword_spam": 0,
     "malicious_links": 0,
     "ads": 0
-  }},
+  },
   "confidence_score": 5
-}}
+}
 
 CRITICAL: Only include "wrong_language": 1 in labels_spam_vector if Wrong Language = YES. Do NOT include this field if it's NO.
 CRITICAL: Only include "unreadable": 1 in labels_spam_vector if Unreadable = YES. Do NOT include this field if it's NO.
 
 Do not include the raw content or uid in the JSON output."""
-
-    def _enforce_rate_limit(self):
-        """Enforce rate limiting for Groq API"""
-        current_time = time.time()
         
-        # Remove requests older than 1 minute
-        self.request_times = [t for t in self.request_times if current_time - t < 60]
+        # Only the user message varies between requests, so the request body around it
+        # is encoded once here and each content piece is spliced in (see _encode_payload)
+        self._prompt_prefix = "Content: "
+        sentinel = "\x00content\x00"
+        self._payload_head, self._payload_tail = orjson.dumps(self._build_payload(sentinel)).split(orjson.dumps(sentinel))
         
-        # If we're at the limit, wait
-        if len(self.request_times) >= self.max_requests_per_minute:
-            sleep_time = 60 - (current_time - self.request_times[0]) + 1
-            if sleep_time > 0:
+        # Exact-match cache of results keyed by content hash, persisted between runs.
+        # One file per model/prompt pair (and pack size) so edits to either never serve stale labels.
+        self.exact_cache = None
+        if exact_cache:
+            fingerprint = hashlib.blake2b(f"{self.model_name}\n{self.master_prompt}".encode('utf-8'), digest_size=8).hexdigest()
+            os.makedirs('cache', exist_ok=True)
+            self.exact_cache = self._open_exact_cache(os.path.join('cache', f'exact_{fingerprint}{cache_suffix}'))
+
+    async def _enforce_rate_limit(self):
+        """Enforce the requests/minute budget shared by all concurrent tasks"""
+        # Fast path: nothing can run between refill and take on the event loop, so a
+        # free token needs no lock - unless others are already queued for one
+        if not self._rate_lock.locked():
+            self._refill_tokens()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+        
+        # Bucket empty - wait in line, just long enough for the next token
+        async with self._rate_lock:
+            self._refill_tokens()
+            while self._tokens < 1:
+                sleep_time = (1 - self._tokens) * 60.0 / self.max_requests_per_minute
                 print(f"⏳ Rate limit reached, waiting {sleep_time:.1f}s...")
-                time.sleep(sleep_time)
-                # Clean up old requests after waiting
-                current_time = time.time()
-                self.request_times = [t for t in self.request_times if current_time - t < 60]
-        
-        # Add minimum delay between requests
-        if self.request_times:
-            time_since_last = current_time - self.request_times[-1]
-            if time_since_last < self.rate_limit_delay:
-                sleep_time = self.rate_limit_delay - time_since_last
-                time.sleep(sleep_time)
-        
-        # Record this request
-        self.request_times.append(time.time())
-
-    def _call_groq_api(self, prompt: str, max_retries: int = 3) -> str:
-        """Call Groq API with proper error handling and retries"""
-        payload = {
+                await asyncio.sleep(sleep_time)
+                self._refill_tokens()
+            self._tokens -= 1
+
+    def _refill_tokens(self):
+        """Add the tokens earned since the last refill, capped at the per-minute limit"""
+        now = time.monotonic()
+        refill_rate = self.max_requests_per_minute / 60.0
+        self._tokens = min(float(self.max_requests_per_minute), self._tokens + (now - self._last_refill) * refill_rate)
+        self._last_refill = now
+
+    def _truncate_content(self, content: str) -> str:
+        """Keep the head and tail of long content to bound input tokens per request"""
+        if len(content) <= self.max_content_chars:
+            return content
+        half = self.max_content_chars // 2
+        return content[:half] + "\n...[truncated]...\n" + content[-half:]
+
+    def _build_payload(self, user_message: str) -> Dict[str, Any]:
+        """Build the chat completions request body for a user message"""
+        return {
             "model": self.model_name,
             "messages": [
                 {
                     "role": "system",
-                    "content": "You are an expert content moderator. Always respond with valid JSON only."
+                    "content": self.master_prompt
                 },
                 {
                     "role": "user", 
-                    "content": prompt
+                    "content": user_message
                 }
             ],
             "temperature": 0,
             "max_tokens": 1000,
             "stream": False
         }
-        
+
+    def _encode_payload(self, content: str) -> bytes:
+        """Encode the request body for a content piece around the pre-encoded static parts"""
+        user_message = orjson.dumps(self._prompt_prefix + self._truncate_content(content))
+        return self._payload_head + user_message + self._payload_tail
+
+    def _encode_packed_payload(self, contents: List[str]) -> bytes:
+        """Encode one request body that asks for a JSON array answer covering several content pieces"""
+        items = "\n\n".join(
+            f"Item {number}:\n{self._prompt_prefix}{self._truncate_content(content)}"
+            for number, content in enumerate(contents, 1)
+        )
+        user_message = (
+            f"Analyze each of the {len(contents)} items below separately.\n\n{items}\n\n"
+            "Return ONLY a JSON array with one object per item, in the same order, "
+            "each in the JSON format described above."
+        )
+        payload = self._build_payload(user_message)
+        payload['max_tokens'] = 150 * len(contents)
+        return orjson.dumps(payload)
+
+    def _pack_items(self, data: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        """Group data into packs of at most items_per_request items within the max_pack_chars budget"""
+        pack = []
+        pack_chars = 0
+        for item in data:
+            chars = min(len(item['content']), self.max_content_chars)
+            if pack and (len(pack) >= self.items_per_request or pack_chars + chars > self.max_pack_chars):
+                yield pack
+                pack = []
+                pack_chars = 0
+            pack.append(item)
+            pack_chars += chars
+        if pack:
+            yield pack
+
+    def _create_client(self, timeout: float = 30) -> httpx.AsyncClient:
+        """Create a pooled HTTP/2 client so concurrent requests share connections"""
+        return httpx.AsyncClient(
+            http2=True,
+            headers=self.headers,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=50)
+        )
+
+    async def _call_groq_api_async(self, client: httpx.AsyncClient, payload: bytes, max_retries: int = 3) -> str:
+        """Call Groq API asynchronously with proper error handling and retries"""
         for attempt in range(max_retries):
             try:
                 # Enforce rate limiting
-                self._enforce_rate_limit()
+                await self._enforce_rate_limit()
                 
-                response = requests.post(
-                    self.api_url,
-                    headers=self.headers,
-                    json=payload,
-                    timeout=30
-                )
+                # Only the HTTP round-trip holds a slot; cache hits and backoff sleeps don't
+                async with self._request_slots:
+                    response = await client.post(self.api_url, content=payload, headers={"Content-Type": "application/json"})
                 
                 if response.status_code == 200:
                     result = response.json()
@@ -178,9 +464,9 @@ Do not include the raw content or uid in the JSON output."""
                 
                 elif response.status_code == 429:
                     # Rate limit exceeded
-                    retry_after = int(response.headers.get('Retry-After', 60))
-                    print(f"⏳ Rate limit exceeded, waiting {retry_after}s...")
-                    time.sleep(retry_after)
+                    retry_after = float(response.headers.get('Retry-After', 60))
+                    print(f"⏳ Rate limit exceeded, waiting {retry_after:.0f}s...")
+                    await asyncio.sleep(retry_after)
                     continue
                 
                 elif response.status_code == 400:
@@ -194,135 +480,222 @@ Do not include the raw content or uid in the JSON output."""
                     if attempt == max_retries - 1:
                         raise Exception(f"API error after {max_retries} attempts: {error_msg}")
                     print(f"⚠️ API error (attempt {attempt + 1}): {error_msg}")
-                    time.sleep(2 ** attempt)  # Exponential backoff
+                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
                     continue
                     
-            except requests.exceptions.Timeout:
+            except httpx.TimeoutException:
                 if attempt == max_retries - 1:
                     raise Exception("API request timed out after multiple attempts")
                 print(f"⚠️ Request timeout (attempt {attempt + 1}), retrying...")
-                time.sleep(2 ** attempt)
+                await asyncio.sleep(2 ** attempt)
                 continue
                 
-            except requests.exceptions.RequestException as e:
+            except httpx.RequestError as e:
                 if attempt == max_retries - 1:
                     raise Exception(f"Request failed after {max_retries} attempts: {str(e)}")
                 print(f"⚠️ Request error (attempt {attempt + 1}): {str(e)}")
-                time.sleep(2 ** attempt)
+                await asyncio.sleep(2 ** attempt)
                 continue
         
         raise Exception(f"Failed to get response after {max_retries} attempts")
 
+    def _csv_options(self, columns: List[str]) -> Dict[str, Any]:
+        """pyarrow CSV options that read only the given columns, as strings"""
+        return {
+            'parse_options': pa_csv.ParseOptions(newlines_in_values=True),  # content spans multiple lines
+            'convert_options': pa_csv.ConvertOptions(
+                include_columns=columns,
+                column_types={column: pa.string() for column in columns}
+            )
+        }
+
+    def _read_csv_columns(self, csv_path: str, columns: List[str], limit: int = None) -> pa.Table:
+        """Read only the given columns of a CSV file as strings, stopping after limit rows"""
+        if not limit:
+            return pa_csv.read_csv(csv_path, **self._csv_options(columns))
+        
+        # Stream record batches so a small limit doesn't parse the whole file
+        batches = []
+        rows = 0
+        with pa_csv.open_csv(csv_path, **self._csv_options(columns)) as reader:
+            for batch in reader:
+                batches.append(batch)
+                rows += batch.num_rows
+                if rows >= limit:
+                    break
+            schema = reader.schema
+        return pa.Table.from_batches(batches, schema=schema).slice(0, limit)
+
+    def iter_csv_data(self, csv_path: str, limit: int = None) -> Iterator[Dict[str, Any]]:
+        """Yield content rows from a CSV file one parsed block at a time, with optional limit"""
+        print(f"📖 Streaming data from {csv_path}...")
+        
+        rows = 0
+        with pa_csv.open_csv(csv_path, **self._csv_options(['uid', 'content'])) as reader:
+            for batch in reader:
+                for item in batch.to_pylist():
+                    if limit and rows >= limit:
+                        return
+                    rows += 1
+                    yield item
+
     def load_csv_data(self, csv_path: str, limit: int = None) -> List[Dict[str, Any]]:
         """Load content data from CSV file with optional limit"""
         print(f"📖 Loading data from {csv_path}...")
         
-        data = []
-        with open(csv_path, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for i, row in enumerate(reader):
-                if limit and i >= limit:
-                    break
-                data.append({
-                    'uid': row['uid'],
-                    'content': row['content']
-                })
+        table = self._read_csv_columns(csv_path, ['uid', 'content'], limit)
+        data = table.to_pylist()
         
         print(f"✅ Loaded {len(data)} content pieces" + (f" (limited to {limit})" if limit else ""))
         return data
 
-    def analyze_content(self, content: str, uid: str, max_retries: int = 3) -> Dict[str, Any]:
-        """Analyze single content piece using Groq API with rate limiting and retry logic"""
-        for attempt in range(max_retries):
-            try:
-                # Format the prompt with content and UID
-                prompt = self.master_prompt.format(content=content, uid=uid)
-                
-                # Get response from Groq API
-                response_text = self._call_groq_api(prompt, max_retries=1)  # Single retry per call
-                
-                # Find JSON in response (in case there's extra text)
-                start_idx = response_text.find('{')
-                end_idx = response_text.rfind('}') + 1
-                
-                if start_idx == -1 or end_idx == 0:
-                    raise ValueError("No JSON found in response")
-                
-                json_str = response_text[start_idx:end_idx]
-                result = json.loads(json_str)
+    def _default_result(self, uid: str) -> Dict[str, Any]:
+        """Safe fallback result for content that could not be analyzed"""
+        # Only include required fields per JSON schema (wrong_language and unreadable not included when 0)
+        return {
+            "uid": uid,
+            "labels_spam": 0,
+            "labels_spam_vector": {
+                "keyword_spam": 0,
+                "malicious_links": 0,
+                "ads": 0
+            },
+            "confidence_score": 1  # Low confidence for failed analysis
+        }
+
+    def _empty_content_result(self, content: str, uid: str) -> Dict[str, Any]:
+        """Label blank content as unreadable without an API call (the rubric's own rule), else None"""
+        if content and not content.isspace():
+            return None
+        return {
+            "uid": uid,
+            "labels_spam": 0,
+            "labels_spam_vector": {
+                "keyword_spam": 0,
+                "malicious_links": 0,
+                "ads": 0,
+                "unreadable": 1
+            },
+            "confidence_score": 5
+        }
 
-                # Attach uid/content locally and normalize fields
-                result['uid'] = uid
-                result['content'] = content
+    def _open_exact_cache(self, path: str):
+        """Open the exact-match cache for this run alone, or return None if that isn't possible"""
+        # shelve has no locking of its own, so concurrent runs in one folder would corrupt or
+        # drop each other's entries; the first run holds an exclusive lock until it exits
+        lock = None
+        try:
+            lock = open(path + '.lock', 'a')
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            cache = shelve.open(path)
+        except Exception as e:
+            if lock is not None:
+                lock.close()
+            print(f"⚠️ Exact-match cache unavailable ({str(e)}), possibly in use by another run; continuing without it")
+            return None
+        self._exact_cache_lock = lock
+        return cache
 
-                # Handle confidence score
-                confidence_score = result.get('confidence_score', 5)
-                if isinstance(confidence_score, str):
-                    try:
-                        confidence_score = int(confidence_score)
-                    except ValueError:
-                        confidence_score = 5
-                result['confidence_score'] = max(1, min(5, confidence_score))  # Clamp between 1-5
-
-                labels = result.setdefault('labels_spam_vector', {})
-
-                # Normalize the three main spam categories (always present)
-                for key in ['keyword_spam', 'malicious_links', 'ads']:
-                    val = labels.get(key, 0)
-                    if isinstance(val, bool):
-                        labels[key] = 1 if val else 0
-                    else:
-                        try:
-                            labels[key] = 1 if int(val) == 1 else 0
-                        except Exception:
-                            labels[key] = 0
-
-                # Handle wrong_language and unreadable conditionally
-                # Only include them in JSON if they are YES (1)
-                wrong_lang_val = labels.get('wrong_language', 0)
-                unreadable_val = labels.get('unreadable', 0)
-
-                if isinstance(wrong_lang_val, bool):
-                    wrong_lang_val = 1 if wrong_lang_val else 0
-                else:
-                    try:
-                        wrong_lang_val = 1 if int(wrong_lang_val) == 1 else 0
-                    except Exception:
-                        wrong_lang_val = 0
+    def _cache_key(self, content: str) -> str:
+        """Hash content for the exact-match cache"""
+        return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
 
-                if isinstance(unreadable_val, bool):
-                    unreadable_val = 1 if unreadable_val else 0
-                else:
-                    try:
-                        unreadable_val = 1 if int(unreadable_val) == 1 else 0
-                    except Exception:
-                        unreadable_val = 0
+    def _cached_result(self, key: str, uid: str) -> Dict[str, Any]:
+        """Return a copy of the cached result for this content with uid attached, if any"""
+        if self.exact_cache is None or key not in self.exact_cache:
+            return None
+        result = self.exact_cache[key]  # shelve unpickles a fresh copy on every read
+        result['uid'] = uid
+        return result
 
-                # Only include wrong_language if it's YES
-                if wrong_lang_val == 1:
-                    labels['wrong_language'] = 1
-                else:
-                    labels.pop('wrong_language', None)
+    def _store_result(self, key: str, result: Dict[str, Any]):
+        """Remember a successful result in the exact-match cache"""
+        if self.exact_cache is not None:
+            self.exact_cache[key] = {k: v for k, v in result.items() if k != 'uid'}
 
-                # Only include unreadable if it's YES
-                if unreadable_val == 1:
-                    labels['unreadable'] = 1
-                else:
-                    labels.pop('unreadable', None)
+    def _start_run(self):
+        """Create the per-run async state inside the running event loop so it binds to it"""
+        self._request_slots = asyncio.Semaphore(self.max_concurrent)
+        self._rate_lock = asyncio.Lock()
+        self._result_futures = {}  # Cache key -> result future, shared by duplicate content
 
-                if 'labels_spam' in result:
-                    val = result['labels_spam']
-                    if isinstance(val, bool):
-                        result['labels_spam'] = 1 if val else 0
-                    else:
-                        try:
-                            result['labels_spam'] = 1 if int(val) == 1 else 0
-                        except Exception:
-                            result['labels_spam'] = 0
+    def analyze_content(self, content: str, uid: str, max_retries: int = 3) -> Dict[str, Any]:
+        """Analyze single content piece (synchronous wrapper around analyze_content_async)"""
+        async def _run():
+            self._start_run()
+            async with self._create_client() as client:
+                return await self.analyze_content_async(client, content, uid, max_retries)
+
+        return asyncio.run(_run())
+
+    async def analyze_content_async(self, client: httpx.AsyncClient, content: str, uid: str, max_retries: int = 3) -> Dict[str, Any]:
+        """Analyze single content piece using Groq API with rate limiting and retry logic"""
+        empty = self._empty_content_result(content, uid)
+        if empty is not None:
+            return empty
+        
+        # Byte-identical content is answered from the exact-match cache
+        key = self._cache_key(content)
+        cached = self._cached_result(key, uid)
+        if cached is not None:
+            return cached
+        
+        # Duplicate content within this run shares one API call, even while it is still in flight
+        future = self._result_futures.get(key)
+        if future is not None:
+            result = await asyncio.shield(future)
+            if result is None:
+                # That attempt gave up; try again rather than reuse its fallback
+                return await self.analyze_content_async(client, content, uid, max_retries)
+            return {**result, 'uid': uid}
+        
+        future = asyncio.get_running_loop().create_future()
+        self._result_futures[key] = future
+        try:
+            result = await self._analyze_uncached(client, content, uid, key, max_retries)
+        except Exception as e:
+            self._fail_pending([(None, key, future)], e)
+            raise
+        if result is None:
+            # Every attempt failed: forget the entry and let duplicates try the API again
+            del self._result_futures[key]
+            future.set_result(None)
+            return self._default_result(uid)
+        future.set_result(result)
+        return result
 
-                # Apply hierarchical rules
-                result = self.apply_hierarchical_rules(result)
+    async def _semantic_lookup(self, content: str, uid: str) -> Tuple[Any, Dict[str, Any]]:
+        """Embed content and return (embedding, cached result or None) from the semantic cache"""
+        # Embedding is CPU-bound, keep it off the event loop
+        loop = asyncio.get_running_loop()
+        embedding = await loop.run_in_executor(None, self.semantic_cache.encode, content)
+        cached = self.semantic_cache.lookup(embedding)
+        if cached is not None:
+            print(f"🧠 Semantic cache hit for {uid[:8]}")
+            cached['uid'] = uid
+        return embedding, cached
+
+    async def _analyze_uncached(self, client: httpx.AsyncClient, content: str, uid: str, key: str, max_retries: int,
+                                embedding: Any = None) -> Dict[str, Any]:
+        """Classify content that missed the exact-match cache (embedding: already looked up, if given).
+
+        Returns None when every attempt failed, so callers can substitute the default result.
+        """
+        if self.semantic_cache and embedding is None:
+            embedding, cached = await self._semantic_lookup(content, uid)
+            if cached is not None:
+                return cached
+        
+        for attempt in range(max_retries):
+            try:
+                # Get response from Groq API
+                response_text = await self._call_groq_api_async(client, self._encode_payload(content), max_retries=1)  # Single retry per call
                 
+                result = self._parse_response(response_text, uid)
+                self._store_result(key, result)
+                if embedding is not None:
+                    self.semantic_cache.add(embedding, result)
                 return result
                 
             except Exception as e:
@@ -331,7 +704,7 @@ Do not include the raw content or uid in the JSON output."""
                     # Rate limit exceeded - wait and retry
                     wait_time = 60 + (attempt * 10)  # 60s, 70s, 80s
                     print(f"⏳ Rate limit hit for {uid}, waiting {wait_time}s before retry {attempt + 1}/{max_retries}")
-                    time.sleep(wait_time)
+                    await asyncio.sleep(wait_time)
                     continue
                 elif attempt == max_retries - 1:
                     # Final attempt failed
@@ -340,22 +713,150 @@ Do not include the raw content or uid in the JSON output."""
                 else:
                     # Other error - wait briefly and retry
                     print(f"⚠️ Error analyzing content {uid} (attempt {attempt + 1}): {error_msg}")
-                    time.sleep(5)
+                    await asyncio.sleep(5)
                     continue
         
-        # Return default safe result if all retries failed
-        # Only include required fields per JSON schema (wrong_language and unreadable not included when 0)
-        return {
-            "uid": uid,
-            "content": content,
-            "labels_spam": 0,
-            "labels_spam_vector": {
-                "keyword_spam": 0,
-                "malicious_links": 0,
-                "ads": 0
-            },
-            "confidence_score": 1  # Low confidence for failed analysis
-        }
+        # All retries failed; the caller falls back to the default safe result
+        return None
+
+    async def analyze_batch_async(self, client: httpx.AsyncClient, items: List[Dict[str, Any]], max_retries: int = 3) -> List[Dict[str, Any]]:
+        """Analyze several content pieces with a single API call, returning results in item order.
+
+        Cached (exact or semantic) and in-flight duplicate content is resolved first; if the packed
+        answer can't be matched back to the items, they fall back to one request each.
+        """
+        loop = asyncio.get_running_loop()
+        results = [None] * len(items)
+        shared = []  # (index, future) for content another task in this run is already analyzing
+        pending = []  # (index, key, future) for content this pack has to analyze
+        for index, item in enumerate(items):
+            key = self._cache_key(item['content'])
+            cached = self._empty_content_result(item['content'], item['uid']) or self._cached_result(key, item['uid'])
+            if cached is not None:
+                results[index] = cached
+            elif key in self._result_futures:
+                shared.append((index, self._result_futures[key]))
+            else:
+                future = loop.create_future()
+                self._result_futures[key] = future
+                pending.append((index, key, future))
+        
+        embeddings = {}  # index -> embedding, for content the semantic cache doesn't know yet
+        try:
+            if self.semantic_cache:
+                misses = []
+                for index, key, future in pending:
+                    embedding, cached = await self._semantic_lookup(items[index]['content'], items[index]['uid'])
+                    if cached is not None:
+                        future.set_result(cached)
+                        results[index] = cached
+                    else:
+                        embeddings[index] = embedding
+                        misses.append((index, key, future))
+                pending = misses
+        except Exception as e:
+            self._fail_pending(pending, e)
+            raise
+        
+        answers = None
+        if len(pending) > 1:
+            try:
+                payload = self._encode_packed_payload([items[index]['content'] for index, _, _ in pending])
+                response_text = await self._call_groq_api_async(client, payload, max_retries)
+                answers = _extract_json(response_text, '[')
+                if not isinstance(answers, list) or len(answers) != len(pending):
+                    raise ValueError("Packed answer does not match the number of items")
+            except Exception as e:
+                print(f"⚠️ Packed request for {len(pending)} items failed ({str(e)}), analyzing them one by one")
+                answers = None
+        
+        try:
+            for position, (index, key, future) in enumerate(pending):
+                item = items[index]
+                result = None
+                if answers is not None:
+                    try:
+                        result = self._normalize_result(answers[position], item['uid'])
+                        self._store_result(key, result)
+                        if index in embeddings:
+                            self.semantic_cache.add(embeddings[index], result)
+                    except Exception as e:
+                        print(f"⚠️ Unusable packed answer for {item['uid'][:8]} ({str(e)}), retrying alone")
+                if result is None:
+                    result = await self._analyze_uncached(client, item['content'], item['uid'], key, max_retries,
+                                                          embeddings.get(index))
+                future.set_result(result)
+                if result is None:
+                    # Every attempt failed: forget the entry and let duplicates try the API again
+                    del self._result_futures[key]
+                    result = self._default_result(item['uid'])
+                results[index] = result
+        except Exception as e:
+            self._fail_pending(pending, e)
+            raise
+        
+        for index, future in shared:
+            result = await asyncio.shield(future)
+            if result is None:
+                # That attempt gave up; try again rather than reuse its fallback
+                results[index] = await self.analyze_content_async(client, items[index]['content'], items[index]['uid'], max_retries)
+            else:
+                results[index] = {**result, 'uid': items[index]['uid']}
+        
+        return results
+
+    def _fail_pending(self, pending: List[Tuple[Any, str, asyncio.Future]], error: Exception):
+        """Hand an error to every unresolved pack future and forget them so later duplicates retry"""
+        for _, key, future in pending:
+            if not future.done():
+                del self._result_futures[key]
+                future.set_exception(error)
+                future.exception()  # Mark retrieved; waiters (if any) still receive it
+
+    def _parse_response(self, response_text: str, uid: str, apply_rules: bool = True) -> Dict[str, Any]:
+        """Parse a model response into a normalized result, optionally applying hierarchical rules"""
+        # Find JSON in response (in case there's extra text)
+        return self._normalize_result(_extract_json(response_text), uid, apply_rules)
+
+    def _normalize_result(self, result: Dict[str, Any], uid: str, apply_rules: bool = True) -> Dict[str, Any]:
+        """Normalize a decoded model answer, optionally applying hierarchical rules"""
+        if not isinstance(result, dict):
+            raise ValueError("Model answer is not a JSON object")
+
+        # Attach uid locally and normalize fields (content is joined back in save_results)
+        result['uid'] = uid
+
+        # Handle confidence score
+        confidence_score = result.get('confidence_score', 5)
+        if isinstance(confidence_score, (str, float)):
+            # Scores must be whole numbers; round "4" / 4.5 style answers from the model
+            try:
+                confidence_score = round(float(confidence_score))
+            except (ValueError, OverflowError):
+                confidence_score = 5
+        result['confidence_score'] = max(1, min(5, confidence_score))  # Clamp between 1-5
+
+        labels = result.setdefault('labels_spam_vector', {})
+
+        # Normalize the three main spam categories (always present)
+        labels.update({key: _to01(labels.get(key, 0)) for key in ('keyword_spam', 'malicious_links', 'ads')})
+
+        # Handle wrong_language and unreadable conditionally
+        # Only include them in JSON if they are YES (1)
+        for key in ('wrong_language', 'unreadable'):
+            if _to01(labels.get(key, 0)):
+                labels[key] = 1
+            else:
+                labels.pop(key, None)
+
+        if 'labels_spam' in result:
+            result['labels_spam'] = _to01(result['labels_spam'])
+
+        # Apply hierarchical rules
+        if apply_rules:
+            result = self.apply_hierarchical_rules(result)
+        
+        return result
 
     def apply_hierarchical_rules(self, result: Dict[str, Any]) -> Dict[str, Any]:
         """Apply business rules for hierarchical classification"""
@@ -386,131 +887,347 @@ Do not include the raw content or uid in the JSON output."""
         
         return result
 
-    def process_batch(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Process all content pieces sequentially"""
-        print(f"🔄 Processing {len(data)} content pieces sequentially...")
+    def apply_hierarchical_rules_batch(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Apply the same business rules as apply_hierarchical_rules to many results at once"""
+        if not results:
+            return results
+        
+        # One row per result: keyword_spam, malicious_links, ads, wrong_language, unreadable
+        flags = np.array([
+            [labels.get('keyword_spam', 0), labels.get('malicious_links', 0), labels.get('ads', 0),
+             labels.get('wrong_language', 0), labels.get('unreadable', 0)]
+            for labels in (r.setdefault('labels_spam_vector', {}) for r in results)
+        ], dtype=np.uint8)
+        
+        # Rules 1 & 2: wrong language or unreadable zeroes the content issues
+        valid = (flags[:, 3] | flags[:, 4]) == 0
+        issues = flags[:, :3] * valid[:, None]
+        # Rule 3: labels_spam is set when any content issue remains
+        spam = issues.any(axis=1)
+        
+        for result, (keyword_spam, malicious_links, ads), labels_spam in zip(results, issues.tolist(), spam.tolist()):
+            labels = result['labels_spam_vector']
+            labels['keyword_spam'] = keyword_spam
+            labels['malicious_links'] = malicious_links
+            labels['ads'] = ads
+            result['labels_spam'] = int(labels_spam)
+        
+        return results
+
+    def process_batch(self, data: Iterable[Dict[str, Any]], output_path: str = None, append: bool = False) -> List[Dict[str, Any]]:
+        """Process all content pieces concurrently (synchronous entry point)"""
+        return asyncio.run(self.process_batch_async(data, output_path, append))
+
+    async def process_batch_async(self, data: Iterable[Dict[str, Any]], output_path: str = None, append: bool = False) -> List[Dict[str, Any]]:
+        """Process all content pieces concurrently, bounded by max_concurrent and the rate limit.
+
+        data may be any iterable (e.g. iter_csv_data); only a bounded window of items is held
+        in flight. When output_path is given, each result is written to that JSONL file in the
+        results folder (appended to it if append is set) as soon as it completes, so partial
+        progress survives a crash and can be resumed.
+        """
+        total = f"/{len(data)}" if hasattr(data, '__len__') else ""
+        print(f"🔄 Processing {len(data) if total else 'all'} content pieces concurrently...")
         print(f"🤖 Using Groq API ({self.model_name}) with rate limiting")
-        print(f"⏳ Rate limit: {self.max_requests_per_minute} requests/minute, {self.rate_limit_delay}s between requests")
+        print(f"⏳ Rate limit: {self.max_requests_per_minute} requests/minute, up to {self.max_concurrent} in flight")
+        if self.items_per_request > 1:
+            print(f"📦 Packing up to {self.items_per_request} items per request")
+        
+        self._start_run()
+        
+        async def analyze_pack(client: httpx.AsyncClient, pack: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+            try:
+                if len(pack) == 1:
+                    results = [await self.analyze_content_async(client, pack[0]['content'], pack[0]['uid'])]
+                else:
+                    results = await self.analyze_batch_async(client, pack)
+            except Exception as e:
+                print(f"❌ Error processing {', '.join(item['uid'][:8] for item in pack)}: {str(e)}")
+                # Add default result for failed items (follow JSON schema - no wrong_language/unreadable when 0)
+                results = [self._default_result(item['uid']) for item in pack]
+            return pack, results
+        
+        results_file = None
+        if output_path:
+            results_path = os.path.join(self.results_dir, output_path)
+            print(f"💾 Streaming results to {results_path}...")
+            results_file = open(results_path, 'ab' if append else 'wb')
         
         results = []
-        completed = 0
+        try:
+            async with self._create_client() as client:
+                # Keep a few packs queued per request slot so slots never idle, without
+                # reading the whole input (and its content) into memory up front
+                packs = self._pack_items(data)
+                window = self.max_concurrent * 4
+                pending = set()
+                while True:
+                    for pack in packs:
+                        pending.add(asyncio.create_task(analyze_pack(client, pack)))
+                        if len(pending) >= window:
+                            break
+                    if not pending:
+                        break
+                    
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        pack, pack_results = task.result()
+                        for item, result in zip(pack, pack_results):
+                            results.append(result)
+                            print(f"   Processed {len(results)}{total}: {item['uid'][:8]}...")
+                            
+                            if results_file is not None:
+                                results_file.write(self._output_record(result, item['content']))
+                    if results_file is not None:
+                        results_file.flush()
+        finally:
+            if results_file is not None:
+                results_file.close()
+            if self.exact_cache is not None:
+                self.exact_cache.sync()
+            if self.semantic_cache:
+                self.semantic_cache.save()
         
+        print("✅ Processing complete!")
+        return results
+
+    def process_batch_api(self, data: List[Dict[str, Any]], poll_interval: int = 30) -> List[Dict[str, Any]]:
+        """Process all content pieces through the Groq Batch API (synchronous entry point)"""
+        return asyncio.run(self.process_batch_api_async(data, poll_interval))
+
+    async def submit_batch(self, client: httpx.AsyncClient, data: List[Dict[str, Any]]) -> str:
+        """Upload every prompt as one JSONL batch file and create a Groq batch job"""
+        lines = []
         for item in data:
-            completed += 1
-            print(f"   Processing {completed}/{len(data)}: {item['uid'][:8]}...")
+            lines.append(
+                b'{"custom_id":' + orjson.dumps(item['uid']) +
+                b',"method":"POST","url":"/v1/chat/completions","body":' + self._encode_payload(item['content']) + b'}'
+            )
+        batch_file = b"\n".join(lines) + b"\n"
+        
+        response = await client.post(
+            f"{self.api_base}/files",
+            data={'purpose': 'batch'},
+            files={'file': ('moderation_batch.jsonl', batch_file, 'application/jsonl')}
+        )
+        response.raise_for_status()
+        file_id = response.json()['id']
+        
+        batch_request = {
+            "input_file_id": file_id,
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h"
+        }
+        response = await client.post(f"{self.api_base}/batches", json=batch_request)
+        response.raise_for_status()
+        batch = response.json()
+        
+        print(f"📦 Submitted batch {batch['id']} with {len(data)} requests")
+        return batch['id']
+
+    async def _wait_for_batch(self, client: httpx.AsyncClient, batch_id: str, poll_interval: int) -> Dict[str, Any]:
+        """Poll a batch job until it reaches a terminal state"""
+        while True:
+            response = await client.get(f"{self.api_base}/batches/{batch_id}")
+            response.raise_for_status()
+            batch = response.json()
+            
+            status = batch.get('status')
+            if status == 'completed':
+                return batch
+            if status in ('failed', 'expired', 'cancelled'):
+                raise Exception(f"Batch {batch_id} ended with status: {status}")
             
+            counts = batch.get('request_counts') or {}
+            print(f"⏳ Batch {status}: {counts.get('completed', 0)}/{counts.get('total', '?')} done, "
+                  f"checking again in {poll_interval}s...")
+            await asyncio.sleep(poll_interval)
+
+    async def process_batch_api_async(self, data: List[Dict[str, Any]], poll_interval: int = 30) -> List[Dict[str, Any]]:
+        """Submit all content pieces as a single batch job and collect the results"""
+        print(f"🔄 Processing {len(data)} content pieces via the Groq Batch API...")
+        print(f"🤖 Using Groq API ({self.model_name}), results may take up to 24h")
+        
+        # Only submit content that isn't already in the exact-match cache
+        cached = {}
+        for item in data:
+            result = self._empty_content_result(item['content'], item['uid']) or self._cached_result(self._cache_key(item['content']), item['uid'])
+            if result is not None:
+                cached[item['uid']] = result
+        pending = [item for item in data if item['uid'] not in cached]
+        if cached:
+            print(f"♻️ {len(cached)} content pieces answered without the API (cache or blank content)")
+        
+        responses = {}
+        async with self._create_client(timeout=300) as client:
+            batch = {}
+            if pending:
+                batch_id = await self.submit_batch(client, pending)
+                batch = await self._wait_for_batch(client, batch_id, poll_interval)
+            
+            if batch.get('output_file_id'):
+                response = await client.get(f"{self.api_base}/files/{batch['output_file_id']}/content")
+                response.raise_for_status()
+                
+                for line in response.text.splitlines():
+                    if not line.strip():
+                        continue
+                    record = orjson.loads(line)
+                    body = (record.get('response') or {}).get('body') or {}
+                    if body.get('choices'):
+                        responses[record['custom_id']] = body['choices'][0]['message']['content'].strip()
+        
+        results = []
+        parsed = []
+        for item in data:
+            if item['uid'] in cached:
+                results.append(cached[item['uid']])
+                continue
             try:
-                result = self.analyze_content(item['content'], item['uid'])
+                response_text = responses.get(item['uid'])
+                if response_text is None:
+                    raise ValueError("No response in batch output")
+                result = self._parse_response(response_text, item['uid'], apply_rules=False)
+                parsed.append((item, result))
                 results.append(result)
             except Exception as e:
                 print(f"❌ Error processing {item['uid'][:8]}: {str(e)}")
-                # Add default result for failed items (follow JSON schema - no wrong_language/unreadable when 0)
-                results.append({
-                    "uid": item['uid'],
-                    "content": item['content'],
-                    "labels_spam": 0,
-                    "labels_spam_vector": {
-                        "keyword_spam": 0,
-                        "malicious_links": 0,
-                        "ads": 0
-                    },
-                    "confidence_score": 1  # Low confidence for failed analysis
-                })
+                results.append(self._default_result(item['uid']))
+        
+        # Apply hierarchical rules to every parsed response in one vectorized pass
+        self.apply_hierarchical_rules_batch([result for _, result in parsed])
+        for item, result in parsed:
+            self._store_result(self._cache_key(item['content']), result)
+        if self.exact_cache is not None:
+            self.exact_cache.sync()
         
         print("✅ Processing complete!")
         return results
 
-    def save_results(self, results: List[Dict[str, Any]], output_path: str):
-        """Save results to JSONL file in results folder"""
-        # Create results folder if it doesn't exist
-        os.makedirs('results', exist_ok=True)
-        
+    def _output_record(self, result: Dict[str, Any], content: str = None) -> bytes:
+        """Encode one JSONL output line, joining in the content (or its hash when save_content is off)"""
+        if content is None:
+            record = result
+        elif self.save_content:
+            record = {**result, 'content': content}
+        else:
+            record = {**result, 'content_sha256': hashlib.sha256(content.encode('utf-8')).hexdigest()}
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+
+    def save_results(self, results: List[Dict[str, Any]], output_path: str, data: List[Dict[str, Any]]):
+        """Save results to JSONL file in results folder, joining content back in from the source data"""
         # Save to results folder
-        results_path = os.path.join('results', output_path)
+        results_path = os.path.join(self.results_dir, output_path)
         print(f"💾 Saving results to {results_path}...")
         
-        with open(results_path, 'w', encoding='utf-8') as file:
-            for result in results:
-                json.dump(result, file, ensure_ascii=False)
-                file.write('\n')
+        # Results only carry the uid; look content up from the loaded rows when writing
+        contents = {item['uid']: item['content'] for item in data}
+        
+        with open(results_path, 'wb', buffering=1 << 20) as file:
+            file.writelines(self._output_record(result, contents.get(result['uid'])) for result in results)
         
         print(f"✅ Results saved to {results_path}")
         return results_path
 
+    def load_results(self, results_path: str) -> List[Dict[str, Any]]:
+        """Load results written by an earlier (possibly interrupted) run, without their content"""
+        if not os.path.exists(results_path):
+            raise ValueError(f"Results file not found: {results_path}")
+        
+        with open(results_path, 'rb') as file:
+            lines = file.read().split(b'\n')
+        
+        # A run killed mid-write can leave a partial last line; cut it so appends start clean
+        if lines[-1]:
+            print(f"⚠️ Dropping incomplete last line of {results_path}")
+            os.truncate(results_path, os.path.getsize(results_path) - len(lines[-1]))
+        
+        results = []
+        for line in lines[:-1]:
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            record.pop('content', None)
+            record.pop('content_sha256', None)
+            results.append(record)
+        return results
+
     def load_human_annotations(self, csv_path: str, limit: int = None) -> Dict[str, Dict[str, Any]]:
         """Load human annotations from CSV for validation"""
         print(f"📖 Loading human annotations from {csv_path}...")
         print(f"🔍 Cross-checking against: {os.path.basename(csv_path)}")
         
-        annotations = {}
-        with open(csv_path, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for i, row in enumerate(reader):
-                if limit and i >= limit:
-                    break
-                
-                # Convert human annotations to our format
-                uid = row['uid']
-                annotations[uid] = {
-                    'keyword_spam': 1 if row['1: Keyword Spam'].lower() == 'yes' else 0,
-                    'malicious_links': 1 if row['2: Malicious Links'].lower() == 'yes' else 0,
-                    'ads': 1 if row['3: Advertisements'].lower() == 'yes' else 0,
-                    'wrong_language': 1 if row['4: Document not in target language'].lower() == 'yes' else 0,
-                    'unreadable': 1 if row['5: Document not readable or incomprehensible'].lower() == 'yes' else 0,
-                    'labels_spam': 1 if row['Answer'].lower() == 'yes' else 0
-                }
+        # Human annotation columns mapped to our label names
+        column_map = {
+            '1: Keyword Spam': 'keyword_spam',
+            '2: Malicious Links': 'malicious_links',
+            '3: Advertisements': 'ads',
+            '4: Document not in target language': 'wrong_language',
+            '5: Document not readable or incomprehensible': 'unreadable',
+            'Answer': 'labels_spam'
+        }
+        
+        table = self._read_csv_columns(csv_path, ['uid'] + list(column_map), limit)
+        
+        # Convert human annotations to our format, one vectorized comparison and int8 cast per column
+        labels = {
+            name: pc.fill_null(pc.equal(pc.utf8_lower(table[column]), 'yes'), False).cast(pa.int8()).to_pylist()
+            for column, name in column_map.items()
+        }
+        names = list(labels)
+        annotations = {
+            uid: dict(zip(names, flags))
+            for uid, *flags in zip(table['uid'].to_pylist(), *labels.values())
+        }
         
         print(f"✅ Loaded {len(annotations)} human annotations from {os.path.basename(csv_path)}")
         return annotations
 
-    def validate_results(self, ai_results: List[Dict[str, Any]], human_annotations: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
-        """Compare AI results with human annotations"""
+    def validate_results(self, ai_results: List[Dict[str, Any]], human_annotations: Dict[str, Dict[str, Any]],
+                         scan: ResultScan = None) -> Dict[str, Any]:
+        """Compare AI results with human annotations (AI labels are taken from scan when given)"""
         print("\n🔍 VALIDATING RESULTS AGAINST HUMAN ANNOTATIONS")
         print("=" * 60)
         
         total = len(ai_results)
-        correct_predictions = 0
-        category_stats = {
-            'keyword_spam': {'correct': 0, 'total': 0, 'ai_yes': 0, 'human_yes': 0},
-            'malicious_links': {'correct': 0, 'total': 0, 'ai_yes': 0, 'human_yes': 0},
-            'ads': {'correct': 0, 'total': 0, 'ai_yes': 0, 'human_yes': 0},
-            'wrong_language': {'correct': 0, 'total': 0, 'ai_yes': 0, 'human_yes': 0},
-            'unreadable': {'correct': 0, 'total': 0, 'ai_yes': 0, 'human_yes': 0},
-            'labels_spam': {'correct': 0, 'total': 0, 'ai_yes': 0, 'human_yes': 0}
-        }
+        categories = list(ResultScan.LABEL_COLUMNS)
         
-        for result in ai_results:
-            uid = result['uid']
-            if uid not in human_annotations:
-                continue
-                
-            human = human_annotations[uid]
-            ai_labels = result['labels_spam_vector']
-            
-            # Overall spam detection accuracy
-            if result['labels_spam'] == human['labels_spam']:
-                correct_predictions += 1
-                category_stats['labels_spam']['correct'] += 1
-            
-            category_stats['labels_spam']['total'] += 1
-            if result['labels_spam'] == 1:
-                category_stats['labels_spam']['ai_yes'] += 1
-            if human['labels_spam'] == 1:
-                category_stats['labels_spam']['human_yes'] += 1
-            
-            # Individual category accuracy
-            for category in ['keyword_spam', 'malicious_links', 'ads', 'wrong_language', 'unreadable']:
-                ai_val = ai_labels.get(category, 0)
-                human_val = human.get(category, 0)
-                
-                if ai_val == human_val:
-                    category_stats[category]['correct'] += 1
-                
-                category_stats[category]['total'] += 1
-                if ai_val == 1:
-                    category_stats[category]['ai_yes'] += 1
-                if human_val == 1:
-                    category_stats[category]['human_yes'] += 1
+        # One N x C matrix of 0/1 labels each for AI and human, rows aligned on annotated uids
+        rows = [i for i, result in enumerate(ai_results) if result['uid'] in human_annotations]
+        matched = [ai_results[i] for i in rows]
+        human = np.zeros((len(matched), len(categories)), dtype=np.int8)
+        for row, result in enumerate(matched):
+            annotation = human_annotations[result['uid']]
+            human[row] = [annotation.get(category, 0) for category in categories]
+        if scan is not None:
+            # The scan already holds the AI labels as columns in the same category order
+            ai = scan.labels[rows]
+        else:
+            ai = np.zeros((len(matched), len(categories)), dtype=np.int8)
+            for row, result in enumerate(matched):
+                labels = result['labels_spam_vector']
+                ai[row] = [labels.get(category, 0) for category in categories[:-1]] + [result['labels_spam']]
+        
+        # One bincount builds every per-category 2x2 confusion matrix: cell = 4*column + 2*ai + human
+        cells = (ai == 1) * 2 + (human == 1) + np.arange(len(categories)) * 4
+        true_negatives, false_negatives, false_positives, true_positives = (
+            np.bincount(cells.ravel(), minlength=4 * len(categories)).reshape(-1, 4).T
+        )
+        correct = true_negatives + true_positives
+        ai_yes = false_positives + true_positives
+        human_yes = false_negatives + true_positives
+        
+        category_stats = {}
+        confusion = {}
+        for column, category in enumerate(categories):
+            category_stats[category] = {
+                'correct': int(correct[column]),
+                'total': len(matched),
+                'ai_yes': int(ai_yes[column]),
+                'human_yes': int(human_yes[column])
+            }
+            confusion[category] = (int(true_positives[column]), int(false_positives[column]), int(false_negatives[column]))
+        correct_predictions = category_stats['labels_spam']['correct']
         
         # Calculate metrics
         overall_accuracy = correct_predictions / total * 100 if total > 0 else 0
@@ -524,32 +1241,7 @@ Do not include the raw content or uid in the JSON output."""
                 continue
                 
             accuracy = stats['correct'] / stats['total'] * 100
-            
-            # Calculate true positives, false positives, false negatives
-            true_positives = 0
-            false_positives = 0
-            false_negatives = 0
-            
-            # Count true positives (both AI and human said YES)
-            for result in ai_results:
-                uid = result['uid']
-                if uid in human_annotations:
-                    human = human_annotations[uid]
-                    ai_labels = result['labels_spam_vector']
-                    
-                    if category == 'labels_spam':
-                        ai_val = result['labels_spam']
-                        human_val = human['labels_spam']
-                    else:
-                        ai_val = ai_labels.get(category, 0)
-                        human_val = human.get(category, 0)
-                    
-                    if ai_val == 1 and human_val == 1:
-                        true_positives += 1
-                    elif ai_val == 1 and human_val == 0:
-                        false_positives += 1
-                    elif ai_val == 0 and human_val == 1:
-                        false_negatives += 1
+            true_positives, false_positives, false_negatives = confusion[category]
             
             # Calculate precision and recall
             precision = true_positives / (true_positives + false_positives) * 100 if (true_positives + false_positives) > 0 else 0
@@ -573,29 +1265,60 @@ Do not include the raw content or uid in the JSON output."""
             'category_stats': category_stats
         }
 
-    def validate_json_schema(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Validate that results match the expected JSON schema format"""
-        print("\n🔍 VALIDATING JSON SCHEMA FORMAT")
-        print("=" * 50)
+    def scan_results(self, results: List[Dict[str, Any]]) -> ResultScan:
+        """Check the schema of every result and count labels/confidence in the same single pass"""
+        scan = ResultScan()
         
-        schema_issues = []
-        total_results = len(results)
+        # Struct-of-arrays: one int8 flag per label column per result, filled row by row
+        flags = array('b')
+        confidence = array('b')
+        
+        # content is attached in save_results, so in-memory results don't carry it
+        required_fields = ['uid', 'labels_spam', 'labels_spam_vector']
+        required_spam_cats = ['keyword_spam', 'malicious_links', 'ads']
         
         for i, result in enumerate(results):
+            # Columnar label flags (in ResultScan.LABEL_COLUMNS order) and confidence
+            labels = result.get('labels_spam_vector', {})
+            keyword_spam = labels.get('keyword_spam')
+            malicious_links = labels.get('malicious_links')
+            ads = labels.get('ads')
+            wrong_lang = labels.get('wrong_language')
+            unreadable_flag = labels.get('unreadable')
+            labels_spam = result.get('labels_spam')
+            conf = result.get('confidence_score', 1)
+            flags.append(keyword_spam == 1)
+            flags.append(malicious_links == 1)
+            flags.append(ads == 1)
+            flags.append(wrong_lang == 1)
+            flags.append(unreadable_flag == 1)
+            flags.append(labels_spam == 1)
+            # Scores outside 1-5 are reported by the schema checks below and stored as 0,
+            # which the summary leaves out of the confidence figures
+            confidence.append(conf if isinstance(conf, int) and 1 <= conf <= 5 else 0)
+            
+            # Fast path: the normalized shape every well-formed result has (plain 0/1 ints,
+            # optional flags present only as 1 and never both) needs no further checks
+            if (type(keyword_spam) is int and type(malicious_links) is int and type(ads) is int
+                    and type(labels_spam) is int and not (keyword_spam | malicious_links | ads | labels_spam) >> 1
+                    and (wrong_lang is None or (wrong_lang == 1 and unreadable_flag is None))
+                    and (unreadable_flag is None or unreadable_flag == 1)
+                    and type(conf) is int and 1 <= conf <= 5 and 'uid' in result):
+                continue
+            
+            # Schema checks
             issues = []
             
             # Check required fields
-            required_fields = ['uid', 'content', 'labels_spam', 'labels_spam_vector']
-            for field in required_fields:
-                if field not in result:
-                    issues.append(f"Missing required field: {field}")
+            for field_name in required_fields:
+                if field_name not in result:
+                    issues.append(f"Missing required field: {field_name}")
             
             # Check labels_spam_vector structure
             if 'labels_spam_vector' in result:
                 labels = result['labels_spam_vector']
                 
                 # Check required spam categories
-                required_spam_cats = ['keyword_spam', 'malicious_links', 'ads']
                 for cat in required_spam_cats:
                     if cat not in labels:
                         issues.append(f"Missing required spam category: {cat}")
@@ -604,16 +1327,16 @@ Do not include the raw content or uid in the JSON output."""
                 
                 # Check conditional fields
                 wrong_lang = labels.get('wrong_language', 0)
-                unreadable = labels.get('unreadable', 0)
+                unreadable_flag = labels.get('unreadable', 0)
                 
-                if wrong_lang == 1 and unreadable == 1:
+                if wrong_lang == 1 and unreadable_flag == 1:
                     issues.append("Both wrong_language and unreadable cannot be 1 simultaneously")
                 
                 # Check that wrong_language/unreadable are only present when 1
                 if wrong_lang == 0 and 'wrong_language' in labels:
                     issues.append("wrong_language should not be present when value is 0")
                 
-                if unreadable == 0 and 'unreadable' in labels:
+                if unreadable_flag == 0 and 'unreadable' in labels:
                     issues.append("unreadable should not be present when value is 0")
             
             # Check labels_spam value
@@ -628,24 +1351,37 @@ Do not include the raw content or uid in the JSON output."""
                     issues.append(f"Invalid confidence_score: {conf} (must be 1-5)")
             
             if issues:
-                schema_issues.append({
+                scan.schema_issues.append({
                     'index': i,
                     'uid': result.get('uid', 'unknown')[:8],
                     'issues': issues
                 })
         
-        # Report results
+        scan.labels = np.frombuffer(flags, dtype=np.int8).reshape(-1, len(ResultScan.LABEL_COLUMNS))
+        scan.confidence = np.frombuffer(confidence, dtype=np.int8)
+        return scan
+
+    def validate_json_schema(self, results: List[Dict[str, Any]], scan: ResultScan = None) -> Dict[str, Any]:
+        """Validate that results match the expected JSON schema format"""
+        if scan is None:
+            scan = self.scan_results(results)
+        schema_issues = scan.schema_issues
+        total_results = scan.total
+        
+        # Report results, written to stdout in one go
+        lines = ["\n🔍 VALIDATING JSON SCHEMA FORMAT", "=" * 50]
         if schema_issues:
-            print(f"❌ Found {len(schema_issues)} results with schema issues:")
-            for issue in schema_issues[:5]:  # Show first 5 issues
-                print(f"  Result {issue['index']} ({issue['uid']}): {', '.join(issue['issues'])}")
+            lines.append(f"❌ Found {len(schema_issues)} results with schema issues:")
+            for issue in islice(schema_issues, 5):  # Show first 5 issues
+                lines.append(f"  Result {issue['index']} ({issue['uid']}): {', '.join(issue['issues'])}")
             if len(schema_issues) > 5:
-                print(f"  ... and {len(schema_issues) - 5} more issues")
+                lines.append(f"  ... and {len(schema_issues) - 5} more issues")
         else:
-            print("✅ All results match expected JSON schema format")
+            lines.append("✅ All results match expected JSON schema format")
         
-        print(f"Schema validation: {total_results - len(schema_issues)}/{total_results} results valid")
-        print("=" * 50)
+        lines.append(f"Schema validation: {total_results - len(schema_issues)}/{total_results} results valid")
+        lines.append("=" * 50)
+        sys.stdout.write("\n".join(lines) + "\n")
         
         return {
             'total_results': total_results,
@@ -654,35 +1390,41 @@ Do not include the raw content or uid in the JSON output."""
             'schema_valid': len(schema_issues) == 0
         }
 
-    def generate_summary(self, results: List[Dict[str, Any]]):
+    def generate_summary(self, results: List[Dict[str, Any]], scan: ResultScan = None):
         """Generate processing summary"""
-        total = len(results)
-        spam_count = sum(1 for r in results if r['labels_spam'] == 1)
-        
-        keyword_spam = sum(1 for r in results if r['labels_spam_vector'].get('keyword_spam', 0) == 1)
-        malicious_links = sum(1 for r in results if r['labels_spam_vector'].get('malicious_links', 0) == 1)
-        ads = sum(1 for r in results if r['labels_spam_vector'].get('ads', 0) == 1)
-        wrong_language = sum(1 for r in results if r['labels_spam_vector'].get('wrong_language', 0) == 1)
-        unreadable = sum(1 for r in results if r['labels_spam_vector'].get('unreadable', 0) == 1)
-        
-        # Confidence score statistics
-        confidence_scores = [r.get('confidence_score', 1) for r in results]
-        avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0
-        low_confidence = sum(1 for score in confidence_scores if score <= 2)
-        
-        print("\n📊 PROCESSING SUMMARY")
-        print("=" * 50)
-        print(f"Total content pieces: {total}")
-        print(f"Spam detected: {spam_count} ({spam_count/total*100:.1f}%)")
-        print(f"  - Keyword spam: {keyword_spam}")
-        print(f"  - Malicious links: {malicious_links}")
-        print(f"  - Advertisements: {ads}")
-        print(f"  - Wrong language: {wrong_language}")
-        print(f"  - Unreadable: {unreadable}")
-        print(f"\nConfidence Analysis:")
-        print(f"  - Average confidence: {avg_confidence:.1f}/5")
-        print(f"  - Low confidence (≤2): {low_confidence} ({low_confidence/total*100:.1f}%)")
-        print("=" * 50)
+        if scan is None:
+            scan = self.scan_results(results)
+        total = scan.total
+        counts = scan.label_counts()
+        spam_count = counts['labels_spam']
+        keyword_spam = counts['keyword_spam']
+        malicious_links = counts['malicious_links']
+        ads = counts['ads']
+        wrong_language = counts['wrong_language']
+        unreadable = counts['unreadable']
+        
+        # Both confidence stats come from one histogram of the 1-5 scores
+        confidence_counts = scan.confidence_counts()
+        low_confidence = int(confidence_counts[1:3].sum())
+        scored = total - int(confidence_counts[0])
+        avg_confidence = int(confidence_counts @ np.arange(len(confidence_counts))) / scored if scored else 0
+        
+        # Whole report written to stdout in one go
+        sys.stdout.write(
+            "\n📊 PROCESSING SUMMARY\n"
+            f"{'=' * 50}\n"
+            f"Total content pieces: {total}\n"
+            f"Spam detected: {spam_count} ({spam_count/total*100:.1f}%)\n"
+            f"  - Keyword spam: {keyword_spam}\n"
+            f"  - Malicious links: {malicious_links}\n"
+            f"  - Advertisements: {ads}\n"
+            f"  - Wrong language: {wrong_language}\n"
+            f"  - Unreadable: {unreadable}\n"
+            "\nConfidence Analysis:\n"
+            f"  - Average confidence: {avg_confidence:.1f}/5\n"
+            f"  - Low confidence (≤2): {low_confidence} ({low_confidence/total*100:.1f}%)\n"
+            f"{'=' * 50}\n"
+        )
 
 def main():
     """Main execution function"""
@@ -696,7 +1438,29 @@ def main():
     parser.add_argument('--csv', type=str, 
                        default="proj-data/spam_pilot_100_feedback x linguist.csv",
                        help='Path to CSV file with content data')
+    parser.add_argument('--batch-api', action='store_true',
+                       help='Submit all content as one Groq Batch API job (lower cost, slower turnaround)')
+    parser.add_argument('--concurrency', type=int, default=10,
+                       help='Maximum number of API requests in flight at once (default: 10)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Disable the exact-match result cache stored in cache/')
+    parser.add_argument('--no-content', action='store_true',
+                       help='Write a content_sha256 hash instead of the full content to the results file')
+    parser.add_argument('--items-per-request', type=int, default=1,
+                       help='Pack this many content pieces into each API request (default: 1)')
+    parser.add_argument('--semantic-cache', action='store_true',
+                       help='Reuse labels for near-duplicate content (requires faiss-cpu and sentence-transformers)')
+    parser.add_argument('--resume', type=str, metavar='RESULTS_FILE',
+                       help='Continue an interrupted run: skip uids already in this results/ file and append to it')
+    parser.add_argument('--pretty', action='store_true',
+                       help='Indent the validation report JSON (written compact by default)')
     args = parser.parse_args()
+    if args.items_per_request < 1:
+        parser.error("--items-per-request must be at least 1")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.resume and args.batch_api:
+        parser.error("--resume is not supported with --batch-api")
     
     print("🤖 Content Moderation Automation with Groq")
     print("=" * 40)
@@ -708,24 +1472,38 @@ def main():
     
     try:
         # Initialize moderator
-        moderator = ContentModerator()
+        moderator = ContentModerator(semantic_cache=args.semantic_cache, exact_cache=not args.no_cache,
+                                     save_content=not args.no_content, items_per_request=args.items_per_request,
+                                     max_concurrent=args.concurrency)
         
-        # Load data
-        data = moderator.load_csv_data(args.csv, args.limit)
+        # Process content, saving results to the results folder
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        previous = []
+        if args.resume:
+            output_filename = os.path.basename(args.resume)
+            previous = moderator.load_results(os.path.join(moderator.results_dir, output_filename))
+            print(f"⏩ Resuming {output_filename}: {len(previous)} content pieces already done")
+        else:
+            output_filename = f"ai_moderation_results_{args.limit or 'all'}_{timestamp}.jsonl"
         
-        # Process content
-        results = moderator.process_batch(data)
+        if args.batch_api:
+            data = moderator.load_csv_data(args.csv, args.limit)
+            results = moderator.process_batch_api(data)
+            moderator.save_results(results, output_filename, data)
+        else:
+            # Rows are streamed from the CSV and results written as they complete
+            done = {result['uid'] for result in previous}
+            data = (item for item in moderator.iter_csv_data(args.csv, args.limit) if item['uid'] not in done)
+            results = previous + moderator.process_batch(data, output_filename, append=bool(args.resume))
         
-        # Save results to results folder
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_filename = f"ai_moderation_results_{len(results)}_{timestamp}.jsonl"
-        results_path = moderator.save_results(results, output_filename)
+        # One pass over the results feeds both the summary and the schema check
+        scan = moderator.scan_results(results)
         
         # Generate summary
-        moderator.generate_summary(results)
+        moderator.generate_summary(results, scan)
         
         # Validate JSON schema format
-        schema_validation = moderator.validate_json_schema(results)
+        schema_validation = moderator.validate_json_schema(results, scan)
         
         # Validation against human annotations
         if args.validate:
@@ -734,19 +1512,18 @@ def main():
             print("=" * 60)
             
             human_annotations = moderator.load_human_annotations(args.csv, args.limit)
-            validation_results = moderator.validate_results(results, human_annotations)
+            validation_results = moderator.validate_results(results, human_annotations, scan)
             
             # Save validation report to results folder
-            os.makedirs('results', exist_ok=True)
             validation_filename = f"validation_report_{len(results)}_{timestamp}.json"
-            validation_path = os.path.join('results', validation_filename)
+            validation_path = os.path.join(moderator.results_dir, validation_filename)
             
-            with open(validation_path, 'w') as f:
-                json.dump(validation_results, f, indent=2)
+            with open(validation_path, 'wb') as f:
+                f.write(orjson.dumps(validation_results, option=orjson.OPT_INDENT_2 if args.pretty else 0))
             print(f"\n📋 Validation report saved to {validation_path}")
         
-        print(f"\n🎉 Success! Check results/ folder for output files.")
-        print(f"📁 Results folder: {os.path.abspath('results')}")
+        print(f"\n🎉 Success! Check {moderator.results_dir}/ folder for output files.")
+        print(f"📁 Results folder: {os.path.abspath(moderator.results_dir)}")
         
     except Exception as e:
         print(f"❌ Error: {str(e)}")
@@ -0,0 +1,63 @@
+"""Regression tests for _extract_json on model output seen in the wild"""
+
+import pytest
+
+from content_moderator import _extract_json
+
+ANSWER = '{"labels_spam": 1, "labels_spam_vector": {"keyword_spam": 1, "malicious_links": 0, "ads": 0}, "confidence_score": 4}'
+EXPECTED = {
+    "labels_spam": 1,
+    "labels_spam_vector": {"keyword_spam": 1, "malicious_links": 0, "ads": 0},
+    "confidence_score": 4,
+}
+
+
+def test_plain_object():
+    assert _extract_json(ANSWER) == EXPECTED
+
+
+def test_code_fence():
+    assert _extract_json(f"```json\n{ANSWER}\n```") == EXPECTED
+
+
+def test_code_fence_with_prose():
+    assert _extract_json(f"Here is the classification:\n```json\n{ANSWER}\n```\nLet me know if you need more.") == EXPECTED
+
+
+def test_braces_inside_strings():
+    text = 'Result: {"reason": "uses {curly} and [square] brackets }", "labels_spam": 0}'
+    assert _extract_json(text) == {"reason": "uses {curly} and [square] brackets }", "labels_spam": 0}
+
+
+def test_escaped_quotes_inside_strings():
+    text = r'{"reason": "he said \"{not json}\" loudly", "labels_spam": 1} trailing }'
+    assert _extract_json(text) == {"reason": 'he said "{not json}" loudly', "labels_spam": 1}
+
+
+def test_prose_braces_before_and_after():
+    text = f"Rules {{1-3}} applied. {ANSWER} Note: see {{appendix}}."
+    assert _extract_json(text) == EXPECTED
+
+
+def test_balanced_non_json_before_object():
+    assert _extract_json(f"Checked {{x}} first, then: {ANSWER}") == EXPECTED
+
+
+def test_no_json_raises():
+    with pytest.raises(ValueError):
+        _extract_json("I cannot classify this content.")
+
+
+def test_packed_array():
+    text = f"[{ANSWER}, {ANSWER}]"
+    assert _extract_json(text, '[') == [EXPECTED, EXPECTED]
+
+
+def test_packed_array_after_prose_bracket():
+    text = f"Answers for items [1] to [2]:\n```json\n[{ANSWER}, {ANSWER}]\n```"
+    assert _extract_json(text, '[') == [EXPECTED, EXPECTED]
+
+
+def test_packed_array_with_brackets_inside_strings():
+    text = '[{"reason": "see [1] and ]"}, {"reason": "fine"}]'
+    assert _extract_json(text, '[') == [{"reason": "see [1] and ]"}, {"reason": "fine"}]